@@ -16,17 +16,31 @@
 # You should have received a copy of the GNU General Public License
 # along with BlenderBIM Add-on.  If not, see <http://www.gnu.org/licenses/>.
 
+import bpy
 import gpu
 import bmesh
+import numpy as np
 import blenderbim.tool as tool
 from math import sin, cos, radians
+from itertools import chain
+from functools import lru_cache
 from bpy.types import SpaceView3D
-from mathutils import Vector, Matrix
-from gpu_extras.batch import batch_for_shader
+from mathutils import Matrix
 
 
 ERROR_ELEMENTS_COLOR = (1, 0.2, 0.322, 1)  # RED
 UNSPECIAL_ELEMENT_COLOR = (0.2, 0.2, 0.2, 1)  # GREY
+ARC_CACHE_SIZE = 1024
+
+# bits of the packed vertex key
+VERTEX_KEY_MANY_EDGES = 1 << 0
+VERTEX_KEY_NOT_TWO_EDGES = 1 << 1
+VERTEX_KEY_ARC = 1 << 2
+VERTEX_KEY_CIRCLE = 1 << 3
+VERTEX_KEY_SELECTED = 1 << 4
+VERTEX_KEY_HIDDEN = 1 << 5
+
+VERTEX_HIDDEN, VERTEX_SELECTED, VERTEX_UNSELECTED, VERTEX_ERROR, VERTEX_SPECIAL = range(5)
 
 
 def transparent_color(color, alpha=0.1):
@@ -35,17 +49,155 @@ def transparent_color(color, alpha=0.1):
     return color
 
 
-def bm_check_vertex_in_groups(vertex, deform_layer, groups):
-    """returns tuple boolean (whether vertex is in any of the groups)
-    and related group index"""
-    for group_index in vertex[deform_layer].keys():
-        if group_index in groups:
-            return True, group_index
-    return False, None
+def bm_get_vertex_groups_csr(bm, deform_layer):
+    """returns vertex groups of all bmesh vertices in CSR form as (offsets, groups) arrays,
+    groups of the i-th vertex are `groups[offsets[i]:offsets[i + 1]]`"""
+    counts = np.fromiter((len(v[deform_layer]) for v in bm.verts), dtype=np.int32, count=len(bm.verts))
+    offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    groups = np.fromiter(
+        chain.from_iterable(v[deform_layer].keys() for v in bm.verts), dtype=np.int32, count=offsets[-1]
+    )
+    return offsets, groups
+
+
+def get_first_vertex_group(offsets, groups, search_groups):
+    """returns for each vertex the first of its groups that is in `search_groups`
+    or -1 if vertex is not in any of them"""
+    vertex_group = np.full(len(offsets) - 1, -1, dtype=np.int32)
+    matches = np.flatnonzero(np.isin(groups, search_groups))
+    if not len(matches):
+        return vertex_group
+    group_vertices = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    vertices, first_matches = np.unique(group_vertices[matches], return_index=True)
+    vertex_group[vertices] = groups[matches[first_matches]]
+    return vertex_group
+
+
+def split_vertices_by_group(vertex_group):
+    """returns dict of group index -> array of vertex indices in that group,
+    vertices with group -1 are skipped"""
+    vertices = np.flatnonzero(vertex_group != -1)
+    vertices = vertices[np.argsort(vertex_group[vertices], kind="stable")]
+    groups, starts = np.unique(vertex_group[vertices], return_index=True)
+    return dict(zip(groups.tolist(), np.split(vertices, starts[1:])))
+
+
+def get_vertex_category(key):
+    if key & VERTEX_KEY_HIDDEN:
+        return VERTEX_HIDDEN
+    if key & VERTEX_KEY_SELECTED:
+        return VERTEX_SELECTED
+    if key & VERTEX_KEY_CIRCLE:
+        return VERTEX_ERROR if key & VERTEX_KEY_MANY_EDGES else VERTEX_SPECIAL
+    if key & VERTEX_KEY_NOT_TWO_EDGES:
+        return VERTEX_ERROR
+    if key & VERTEX_KEY_ARC:
+        return VERTEX_SPECIAL
+    return VERTEX_UNSELECTED
+
+
+# category for every possible packed vertex key
+# so vertices can be classified with a single lookup instead of branching per vertex
+VERTEX_CATEGORIES = np.array([get_vertex_category(key) for key in range(VERTEX_KEY_HIDDEN << 1)], dtype=np.int8)
+
+
+def pack_vertex_keys(hide, select, is_circle, is_arc, degree):
+    """returns array of vertex keys to lookup in `VERTEX_CATEGORIES`"""
+    keys = np.where(degree > 1, VERTEX_KEY_MANY_EDGES, 0)
+    keys |= np.where(degree != 2, VERTEX_KEY_NOT_TWO_EDGES, 0)
+    keys |= np.where(is_arc, VERTEX_KEY_ARC, 0)
+    keys |= np.where(is_circle, VERTEX_KEY_CIRCLE, 0)
+    keys |= np.where(select, VERTEX_KEY_SELECTED, 0)
+    keys |= np.where(hide, VERTEX_KEY_HIDDEN, 0)
+    return keys
+
+
+VERTEX_DATA_DTYPE = np.dtype(
+    [("x", np.float32), ("y", np.float32), ("z", np.float32), ("select", bool), ("hide", bool), ("degree", np.int32)]
+)
+EDGE_DATA_DTYPE = np.dtype(
+    [
+        ("v1", np.int32),
+        ("v2", np.int32),
+        ("select", bool),
+        ("hide", bool),
+        ("has_angle", bool),
+        ("is_preview", bool),
+    ]
+)
+
+
+def bm_get_vertices_data(bm):
+    """returns `VERTEX_DATA_DTYPE` structured array with all per-vertex data
+    the decorator needs, collected in a single pass over bmesh vertices"""
+    return np.fromiter(
+        ((*v.co, v.select, v.hide, len(v.link_edges)) for v in bm.verts),
+        dtype=VERTEX_DATA_DTYPE,
+        count=len(bm.verts),
+    )
+
+
+def bm_get_edges_data(bm, angle_layer=None, preview_layer=None):
+    """returns `EDGE_DATA_DTYPE` structured array with all per-edge data
+    the decorator needs, collected in a single pass over bmesh edges"""
+    return np.fromiter(
+        (
+            (
+                e.verts[0].index,
+                e.verts[1].index,
+                e.select,
+                e.hide,
+                bool(angle_layer) and e[angle_layer] > 0,
+                bool(preview_layer) and e[preview_layer] == 1,
+            )
+            for e in bm.edges
+        ),
+        dtype=EDGE_DATA_DTYPE,
+        count=len(bm.edges),
+    )
+
+
+def get_world_coords(vertices_data, matrix_world):
+    """returns (N, 3) float32 array of vertices coordinates in world space"""
+    coords = np.column_stack((vertices_data["x"], vertices_data["y"], vertices_data["z"]))
+    matrix = np.array(matrix_world, dtype=np.float32)
+    # one batched affine transform instead of `matrix_world @ vertex.co` on each vertex
+    return coords @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+@lru_cache(maxsize=None)
+def get_vertex_format(with_color=False):
+    """returns GPUVertFormat with "pos" and optional "color" attributes,
+    created only once since all decorator buffers share the same layout"""
+    vertex_format = gpu.types.GPUVertFormat()
+    vertex_format.attr_add(id="pos", comp_type="F32", len=3, fetch_mode="FLOAT")
+    if with_color:
+        vertex_format.attr_add(id="color", comp_type="F32", len=4, fetch_mode="FLOAT")
+    return vertex_format
+
+
+def create_vertices_buffer(coords, colors=None):
+    """returns GPUVertBuf with "pos" attribute filled directly from (N, 3) float32 array
+    and optional "color" attribute filled from (N, 4) float32 array"""
+    vertices_buffer = gpu.types.GPUVertBuf(get_vertex_format(colors is not None), len(coords))
+    vertices_buffer.attr_fill("pos", coords)
+    if colors is not None:
+        vertices_buffer.attr_fill("color", colors)
+    return vertices_buffer
+
+
+def on_depsgraph_update(scene, depsgraph):
+    ProfileDecorator.depsgraph_updates += 1
 
 
 class ProfileDecorator:
     installed = None
+    # bumped on every depsgraph update (mesh edits, selection changes, etc.)
+    # so the decorator knows when the cached batches are outdated
+    depsgraph_updates = 0
+    unit_circle = None
+    arc_cache = {}
 
     @classmethod
     def install(cls, context, get_custom_bmesh=None, draw_faces=False, exit_edit_mode_callback=None):
@@ -56,6 +208,7 @@ class ProfileDecorator:
         if cls.installed:
             cls.uninstall()
         handler = cls()
+        bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
         cls.installed = SpaceView3D.draw_handler_add(
             handler, (context, get_custom_bmesh, draw_faces, exit_edit_mode_callback), "WINDOW", "POST_VIEW"
         )
@@ -66,30 +219,84 @@ class ProfileDecorator:
             SpaceView3D.draw_handler_remove(cls.installed, "WINDOW")
         except ValueError:
             pass
+        if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+            bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
         cls.installed = None
 
-    def draw_batch(self, shader_type, content_pos, color, indices=None):
+    def __init__(self):
+        self.batches = []
+        self.batches_key = None
+        self.vertices_buffer = None
+        self.vertices_buffer_coords = None
+
+    def add_batch(self, shader_type, content_pos, color, indices=None):
+        content_pos = np.asarray(content_pos, dtype=np.float32)
+        if not len(content_pos):
+            return
+        if indices is not None:
+            self.add_indexed_batch(shader_type, create_vertices_buffer(content_pos), color, indices)
+            return
         shader = self.line_shader if shader_type == "LINES" else self.shader
-        batch = batch_for_shader(shader, shader_type, {"pos": content_pos}, indices=indices)
-        shader.uniform_float("color", color)
-        batch.draw(shader)
+        batch = gpu.types.GPUBatch(type=shader_type, buf=create_vertices_buffer(content_pos))
+        self.batches.append((shader, batch, color))
+
+    def add_indexed_batch(self, shader_type, vertices_buffer, color, indices):
+        if not len(indices):
+            return
+        shader = self.line_shader if shader_type == "LINES" else self.shader
+        batch = gpu.types.GPUBatch(
+            type=shader_type, buf=vertices_buffer, elem=gpu.types.GPUIndexBuf(type=shader_type, seq=indices)
+        )
+        self.batches.append((shader, batch, color))
 
-    def draw_faces(self, bm, vertices_coords):
+    def add_multicolor_batch(self, shader_type, groups):
+        """merges `groups` of (positions, color) into a single batch with per-vertex colors
+        to draw all of them in one call. Groups are drawn in the provided order"""
+        groups = [(positions, color) for positions, color in groups if len(positions)]
+        if not groups:
+            return
+        positions = np.concatenate([positions for positions, _ in groups])
+        colors = np.concatenate(
+            [np.tile(np.array(color, dtype=np.float32), (len(positions), 1)) for positions, color in groups]
+        )
+        shader = self.line_flat_shader if shader_type == "LINES" else self.flat_shader
+        batch = gpu.types.GPUBatch(type=shader_type, buf=create_vertices_buffer(positions, colors))
+        # color is already stored in the batch
+        self.batches.append((shader, batch, None))
+
+    def get_vertices_buffer(self, vertices_coords):
+        """returns GPUVertBuf with `vertices_coords` positions for indexed batches.
+
+        Buffer from the previous rebuild is reused if vertices haven't moved
+        (e.g. only selection has changed)"""
+        if self.vertices_buffer is None or not np.array_equal(self.vertices_buffer_coords, vertices_coords):
+            self.vertices_buffer = create_vertices_buffer(vertices_coords)
+            self.vertices_buffer_coords = vertices_coords
+        return self.vertices_buffer
+
+    def add_faces_batch(self, bm, vertices_coords):
         """mutates original bm (triangulates it)
         so the triangulation edges will be shown too
         """
         traingulated_bm = bm
         bmesh.ops.triangulate(traingulated_bm, faces=traingulated_bm.faces)
 
-        face_indices = [[v.index for v in f.verts] for f in traingulated_bm.faces]
+        face_indices = np.fromiter(
+            chain.from_iterable((v.index for v in f.verts) for f in traingulated_bm.faces),
+            dtype=np.int32,
+            count=len(traingulated_bm.faces) * 3,
+        )
+        if not len(face_indices):
+            return
+        # upload only vertices that are actually used by faces
+        used_vertices, face_indices = np.unique(face_indices, return_inverse=True)
+        face_indices = face_indices.reshape(-1, 3).astype(np.int32)
+        vertices_buffer = self.get_vertices_buffer(vertices_coords[used_vertices])
         faces_color = transparent_color(self.addon_prefs.decorator_color_special)
-        self.draw_batch("TRIS", vertices_coords, faces_color, face_indices)
+        self.add_indexed_batch("TRIS", vertices_buffer, faces_color, face_indices)
 
     def __call__(self, context, get_custom_bmesh=None, draw_faces=False, exit_edit_mode_callback=None):
         self.addon_prefs = context.preferences.addons["blenderbim"].preferences
-        selected_elements_color = self.addon_prefs.decorator_color_selected
-        unselected_elements_color = self.addon_prefs.decorator_color_unselected
-        special_elements_color = self.addon_prefs.decorator_color_special
 
         obj = context.active_object
 
@@ -99,98 +306,11 @@ class ProfileDecorator:
                 exit_edit_mode_callback()
             return
 
-        if get_custom_bmesh:
-            bm = get_custom_bmesh()
-        else:
-            bm = bmesh.from_edit_mesh(obj.data)
-
+        previous_blend = gpu.state.blend_get()
         gpu.state.point_size_set(6)
-        gpu.state.blend_set("ALPHA")
-
-        ### Actually drawing
-        all_vertices = []
-        error_vertices = []
-        selected_vertices = []
-        unselected_vertices = []
-        # special = associated with arcs/circles
-        special_vertices = []
-        special_vertex_indices = {}
-        selected_edges = []
-        unselected_edges = []
-        arc_edges = []
-        roof_angle_edges = []
-        preview_edges = []
-
-        arc_groups = []
-        circle_groups = []
-        for i, group in enumerate(obj.vertex_groups):
-            if "IFCARCINDEX" in group.name:
-                arc_groups.append(i)
-            elif "IFCCIRCLE" in group.name:
-                circle_groups.append(i)
-
-        arcs = {}
-        circles = {}
-
-        # https://docs.blender.org/api/blender_python_api_2_63_8/bmesh.html#CustomDataAccess
-        # This is how we access vertex groups via bmesh, apparently, it's not very intuitive
-        deform_layer = bm.verts.layers.deform.active
-        angle_layer = bm.edges.layers.float.get("BBIM_gable_roof_angles")
-        preview_layer = bm.edges.layers.int.get("BBIM_preview")
-
-        for vertex in bm.verts:
-            co = tuple(obj.matrix_world @ vertex.co)
-            all_vertices.append(co)
-            if vertex.hide:
-                continue
-
-            is_arc, is_circle = False, False
-            # deform_layer is None if there are no verts assigned to vertex groups
-            # even if there are vertex groups in the obj.vertex_groups
-            if deform_layer:
-                is_arc, group_index = bm_check_vertex_in_groups(vertex, deform_layer, arc_groups)
-                if is_arc:
-                    arcs.setdefault(group_index, []).append(vertex)
-                    special_vertex_indices[vertex.index] = group_index
-
-                is_circle, group_index = bm_check_vertex_in_groups(vertex, deform_layer, circle_groups)
-                if is_circle:
-                    circles.setdefault(group_index, []).append(vertex)
-                    special_vertex_indices[vertex.index] = group_index
-
-            if vertex.select:
-                selected_vertices.append(co)
-            else:
-                if len(vertex.link_edges) > 1 and is_circle:
-                    error_vertices.append(co)
-                elif is_circle:
-                    special_vertices.append(co)
-                elif len(vertex.link_edges) != 2:
-                    error_vertices.append(co)
-                elif is_arc:
-                    special_vertices.append(co)
-                else:
-                    unselected_vertices.append(co)
+        if previous_blend != "ALPHA":
+            gpu.state.blend_set("ALPHA")
 
-        for edge in bm.edges:
-            edge_indices = [v.index for v in edge.verts]
-            if edge.hide:
-                continue
-            if edge.select:
-                selected_edges.append(edge_indices)
-            else:
-                i1, i2 = edge.verts[0].index, edge.verts[1].index
-                # making sure that both vertices are in the same group
-                if i1 in special_vertex_indices and special_vertex_indices[i1] == special_vertex_indices.get(i2, None):
-                    arc_edges.append(edge_indices)
-                elif angle_layer and edge[angle_layer] > 0:
-                    roof_angle_edges.append(edge_indices)
-                elif preview_layer and edge[preview_layer] == 1:
-                    preview_edges.append(edge_indices)
-                else:
-                    unselected_edges.append(edge_indices)
-
-        ### Actually drawing
         # 3D_POLYLINE_UNIFORM_COLOR is good for smoothed lines since `bgl.enable(GL_LINE_SMOOTH)` is deprecated
         self.line_shader = gpu.shader.from_builtin("3D_POLYLINE_UNIFORM_COLOR")
         self.line_shader.bind()
@@ -198,72 +318,246 @@ class ProfileDecorator:
         self.line_shader.uniform_float("viewportSize", (context.region.width, context.region.height))
         self.line_shader.uniform_float("lineWidth", 2.0)
 
+        # same as above but with per-vertex colors to draw different kinds of edges in one batch
+        self.line_flat_shader = gpu.shader.from_builtin("3D_POLYLINE_FLAT_COLOR")
+        self.line_flat_shader.bind()
+        self.line_flat_shader.uniform_float("viewportSize", (context.region.width, context.region.height))
+        self.line_flat_shader.uniform_float("lineWidth", 2.0)
+
         # general shader
         self.shader = gpu.shader.from_builtin("3D_UNIFORM_COLOR")
-        self.shader.bind()
+        self.flat_shader = gpu.shader.from_builtin("3D_FLAT_COLOR")
+
+        # batches are rebuilt only if something has changed since the last redraw,
+        # most of redraws (e.g. viewport navigation) just draw the cached batches
+        batches_key = (
+            ProfileDecorator.depsgraph_updates,
+            obj.as_pointer(),
+            tuple(self.addon_prefs.decorator_color_selected),
+            tuple(self.addon_prefs.decorator_color_unselected),
+            tuple(self.addon_prefs.decorator_color_special),
+        )
+        if batches_key != self.batches_key:
+            if get_custom_bmesh:
+                bm = get_custom_bmesh()
+            else:
+                bm = bmesh.from_edit_mesh(obj.data)
+            self.batches = []
+            self.create_batches(obj, bm, draw_faces)
+            self.batches_key = batches_key
+
+        # shader is rebound only when it actually changes between batches
+        bound_shader = None
+        for shader, batch, color in self.batches:
+            if shader is not bound_shader:
+                shader.bind()
+                bound_shader = shader
+            if color is not None:
+                shader.uniform_float("color", color)
+            batch.draw(shader)
+
+        # restore the state so it won't leak into the other draw handlers
+        gpu.state.point_size_set(1)
+        if previous_blend != "ALPHA":
+            gpu.state.blend_set(previous_blend)
+
+    def create_batches(self, obj, bm, draw_faces=False):
+        if not bm.verts:
+            return
+
+        selected_elements_color = self.addon_prefs.decorator_color_selected
+        unselected_elements_color = self.addon_prefs.decorator_color_unselected
+        special_elements_color = self.addon_prefs.decorator_color_special
+
+        arc_groups = set()
+        circle_groups = set()
+        for i, group in enumerate(obj.vertex_groups):
+            if "IFCARCINDEX" in group.name:
+                arc_groups.add(i)
+            elif "IFCCIRCLE" in group.name:
+                circle_groups.add(i)
+
+        # https://docs.blender.org/api/blender_python_api_2_63_8/bmesh.html#CustomDataAccess
+        # This is how we access vertex groups via bmesh, apparently, it's not very intuitive
+        deform_layer = bm.verts.layers.deform.active
+        angle_layer = bm.edges.layers.float.get("BBIM_gable_roof_angles")
+        preview_layer = bm.edges.layers.int.get("BBIM_preview")
+
+        # matrix_world access creates a new Matrix each time, so it's read only once
+        matrix_world = obj.matrix_world.copy()
+        # bmesh elements are only accessed in these two passes,
+        # everything below works with the collected arrays
+        vertices_data = bm_get_vertices_data(bm)
+        edges_data = bm_get_edges_data(bm, angle_layer, preview_layer)
+
+        all_vertices = get_world_coords(vertices_data, matrix_world)
+        n_verts = len(vertices_data)
+        vertex_select = vertices_data["select"]
+        vertex_hide = vertices_data["hide"]
+        vertex_degree = vertices_data["degree"]
+        arc_group = np.full(n_verts, -1, dtype=np.int32)
+        circle_group = np.full(n_verts, -1, dtype=np.int32)
+
+        # deform_layer is None if there are no verts assigned to vertex groups
+        # even if there are vertex groups in the obj.vertex_groups.
+        # Most of meshes don't have any arcs or circles, so there is no need to check vertex groups at all
+        if deform_layer and (arc_groups or circle_groups):
+            offsets, groups = bm_get_vertex_groups_csr(bm, deform_layer)
+            arc_group = get_first_vertex_group(offsets, groups, list(arc_groups))
+            circle_group = get_first_vertex_group(offsets, groups, list(circle_groups))
+            arc_group[vertex_hide] = -1
+            circle_group[vertex_hide] = -1
+
+        is_arc = arc_group != -1
+        is_circle = circle_group != -1
+        # special = associated with arcs/circles, -1 = not special
+        special_group = np.where(is_circle, circle_group, arc_group)
+        arcs = split_vertices_by_group(arc_group)
+        circles = split_vertices_by_group(circle_group)
+
+        vertex_keys = pack_vertex_keys(vertex_hide, vertex_select, is_circle, is_arc, vertex_degree)
+        vertex_categories = VERTEX_CATEGORIES[vertex_keys]
+
+        selected_vertices = all_vertices[vertex_categories == VERTEX_SELECTED]
+        unselected_vertices = all_vertices[vertex_categories == VERTEX_UNSELECTED]
+        error_vertices = all_vertices[vertex_categories == VERTEX_ERROR]
+        special_vertices = all_vertices[vertex_categories == VERTEX_SPECIAL]
+
+        edge_vertices = np.column_stack((edges_data["v1"], edges_data["v2"]))
+        edge_select = edges_data["select"]
+        edge_hide = edges_data["hide"]
+        edge_has_angle = edges_data["has_angle"]
+        edge_is_preview = edges_data["is_preview"]
+
+        visible_edges = ~edge_hide
+        selected_edges_mask = visible_edges & edge_select
+        remaining_edges = visible_edges & ~edge_select
+        # making sure that both vertices are in the same group
+        edge_groups = special_group[edge_vertices]
+        arc_edges_mask = remaining_edges & (edge_groups[:, 0] != -1) & (edge_groups[:, 0] == edge_groups[:, 1])
+        remaining_edges &= ~arc_edges_mask
+        roof_angle_edges_mask = remaining_edges & edge_has_angle
+        remaining_edges &= ~roof_angle_edges_mask
+        preview_edges_mask = remaining_edges & edge_is_preview
+        remaining_edges &= ~preview_edges_mask
+
+        selected_edges = edge_vertices[selected_edges_mask]
+        unselected_edges = edge_vertices[remaining_edges]
+        arc_edges = edge_vertices[arc_edges_mask]
+        roof_angle_edges = edge_vertices[roof_angle_edges_mask]
+        preview_edges = edge_vertices[preview_edges_mask]
 
         # Draw faces
         if draw_faces:
-            self.draw_faces(bm, all_vertices)
-
-        self.draw_batch("LINES", all_vertices, transparent_color(unselected_elements_color), unselected_edges)
-        self.draw_batch("LINES", all_vertices, selected_elements_color, selected_edges)
-        self.draw_batch("LINES", all_vertices, UNSPECIAL_ELEMENT_COLOR, arc_edges)
-        self.draw_batch("LINES", all_vertices, special_elements_color, preview_edges)
-        self.draw_batch("LINES", all_vertices, special_elements_color, roof_angle_edges)
+            self.add_faces_batch(bm, all_vertices)
+
+        # every edge gets its own pair of vertices so each edge can have its own color
+        self.add_multicolor_batch(
+            "LINES",
+            (
+                (all_vertices[unselected_edges.ravel()], transparent_color(unselected_elements_color)),
+                (all_vertices[selected_edges.ravel()], selected_elements_color),
+                (all_vertices[arc_edges.ravel()], UNSPECIAL_ELEMENT_COLOR),
+                (all_vertices[preview_edges.ravel()], special_elements_color),
+                (all_vertices[roof_angle_edges.ravel()], special_elements_color),
+            ),
+        )
 
-        self.draw_batch("POINTS", unselected_vertices, transparent_color(unselected_elements_color, 0.5))
-        self.draw_batch("POINTS", error_vertices, ERROR_ELEMENTS_COLOR)
-        self.draw_batch("POINTS", special_vertices, special_elements_color)
-        self.draw_batch("POINTS", selected_vertices, selected_elements_color)
+        self.add_multicolor_batch(
+            "POINTS",
+            (
+                (unselected_vertices, transparent_color(unselected_elements_color, 0.5)),
+                (error_vertices, ERROR_ELEMENTS_COLOR),
+                (special_vertices, special_elements_color),
+                (selected_vertices, selected_elements_color),
+            ),
+        )
 
         # Draw arcs
         arc_centroids = []
         arc_segments = []
+        if arcs:
+            # number of edges connecting each vertex to the other vertices of the same arc
+            edge_arc_groups = arc_group[edge_vertices]
+            arc_internal_edges = (edge_arc_groups[:, 0] != -1) & (edge_arc_groups[:, 0] == edge_arc_groups[:, 1])
+            arc_degree = np.bincount(edge_vertices[arc_internal_edges].ravel(), minlength=n_verts)
         for arc in arcs.values():
             if len(arc) != 3:
                 continue
             sorted_arc = [None, None, None]
-            for v1 in arc:
-                connections = 0
-                for link_edge in v1.link_edges:
-                    v2 = link_edge.other_vert(v1)
-                    if v2 in arc:
-                        connections += 1
-                if connections == 2:  # Midpoint
-                    sorted_arc[1] = v1
+            for i in arc:
+                if arc_degree[i] == 2:  # Midpoint
+                    sorted_arc[1] = i
                 else:
-                    sorted_arc[2 if sorted_arc[2] is None else 0] = v1
-            points = [tuple(obj.matrix_world @ v.co) for v in sorted_arc]
-            centroid = tool.Cad.get_center_of_arc(points)
+                    sorted_arc[2 if sorted_arc[2] is None else 0] = i
+            if None in sorted_arc:
+                continue
+            centroid, segments = self.get_arc_geometry(all_vertices[sorted_arc])
             if centroid:
-                arc_centroids.append(tuple(centroid))
-            arc_segments.append(tool.Cad.create_arc_segments(pts=points, num_verts=17, make_edges=True))
-
-        self.draw_batch("POINTS", arc_centroids, UNSPECIAL_ELEMENT_COLOR)
-        for verts, edges in arc_segments:
-            self.draw_batch("LINES", verts, special_elements_color, edges)
+                arc_centroids.append(centroid)
+            arc_segments.append(segments)
+
+        self.add_batch("POINTS", arc_centroids, UNSPECIAL_ELEMENT_COLOR)
+        if arc_segments:
+            # all arcs are merged in a single batch, same as circles below
+            # arrays are allocated once with the final size instead of growing lists
+            n_arc_verts = sum(len(verts) for verts, _ in arc_segments)
+            n_arc_edges = sum(len(edges) for _, edges in arc_segments)
+            arc_segments_verts = np.empty((n_arc_verts, 3), dtype=np.float32)
+            arc_segments_edges = np.empty((n_arc_edges, 2), dtype=np.int32)
+            verts_offset = edges_offset = 0
+            for verts, edges in arc_segments:
+                arc_segments_verts[verts_offset : verts_offset + len(verts)] = verts
+                arc_segments_edges[edges_offset : edges_offset + len(edges)] = edges + verts_offset
+                verts_offset += len(verts)
+                edges_offset += len(edges)
+            self.add_batch("LINES", arc_segments_verts, special_elements_color, arc_segments_edges)
 
         # Draw circles
-        circle_centroids = []
-        circle_segments = []
-        for circle in circles.values():
-            if len(circle) != 2:
-                continue
-            p1 = obj.matrix_world @ circle[0].co
-            p2 = obj.matrix_world @ circle[1].co
-            radius = (p2 - p1).length / 2
-            centroid = p1.lerp(p2, 0.5)
-            circle_centroids.append(tuple(centroid))
-            segments = self.create_circle_segments(360, 20, radius)
-            matrix = obj.matrix_world.copy()
-            matrix.col[3] = centroid.to_4d()
-            segments = [[list(matrix @ Vector(v)) for v in segments[0]], segments[1]]
-            circle_segments.append(segments)
-
-        self.draw_batch("POINTS", circle_centroids, UNSPECIAL_ELEMENT_COLOR)
-        for verts, edges in circle_segments:
-            self.draw_batch("LINES", verts, special_elements_color, edges)
+        # circles are drawn by scaling and moving the same unit circle,
+        # all circles are computed at once and merged in a single batch
+        circle_pairs = [circle for circle in circles.values() if len(circle) == 2]
+        if circle_pairs:
+            circle_pairs = np.array(circle_pairs, dtype=np.int32)
+            unit_circle_verts, unit_circle_edges = self.get_unit_circle()
+            rotation = np.array(matrix_world.to_3x3(), dtype=np.float32)
+            p1 = all_vertices[circle_pairs[:, 0]]
+            p2 = all_vertices[circle_pairs[:, 1]]
+            radii = np.linalg.norm(p2 - p1, axis=1) / 2
+            circle_centroids = (p1 + p2) / 2
+            # (circles, circle verts, 3)
+            circle_verts = radii[:, None, None] * (unit_circle_verts @ rotation.T) + circle_centroids[:, None]
+            offsets = np.arange(len(circle_pairs), dtype=np.int32) * len(unit_circle_verts)
+            circle_edges = unit_circle_edges + offsets[:, None, None]
+
+            self.add_batch("POINTS", circle_centroids, UNSPECIAL_ELEMENT_COLOR)
+            self.add_batch("LINES", circle_verts.reshape(-1, 3), special_elements_color, circle_edges.reshape(-1, 2))
+
+    @classmethod
+    def get_arc_geometry(cls, arc_points):
+        """returns (centroid, segments) of the arc going through 3 points.
+
+        Result is cached by points coordinates since arcs rarely change between rebuilds"""
+        points = [tuple(float(c) for c in co) for co in arc_points]
+        key = tuple(round(c, 6) for co in points for c in co)
+        arc_geometry = cls.arc_cache.get(key)
+        if arc_geometry is None:
+            centroid = tool.Cad.get_center_of_arc(points)
+            verts, edges = tool.Cad.create_arc_segments(pts=points, num_verts=17, make_edges=True)
+            segments = (np.array(verts, dtype=np.float32), np.array(edges, dtype=np.int32).reshape(-1, 2))
+            arc_geometry = (tuple(centroid) if centroid else None, segments)
+            if len(cls.arc_cache) >= ARC_CACHE_SIZE:
+                # drop the oldest arc
+                del cls.arc_cache[next(iter(cls.arc_cache))]
+            cls.arc_cache[key] = arc_geometry
+        return arc_geometry
+
+    def get_unit_circle(self):
+        """returns (verts, edges) arrays of circle with radius 1, it's tessellated only once"""
+        if ProfileDecorator.unit_circle is None:
+            verts, edges = self.create_circle_segments(360, 20, 1)
+            ProfileDecorator.unit_circle = (np.array(verts, dtype=np.float32), np.array(edges, dtype=np.int32))
+        return ProfileDecorator.unit_circle
 
     def create_matrix(self, p, x, y, z):
         return Matrix([x, y, z, p]).to_4x4().transposed()
@@ -276,28 +570,25 @@ class ProfileDecorator:
             theta = Angle / (Vertices - 1)
         else:
             theta = Angle / Vertices
-        listVertX = []
-        listVertY = []
-        for i in range(Vertices):
-            listVertX.append(Radius * cos(radians(theta * i)))
-            listVertY.append(Radius * sin(radians(theta * i)))
+        angles = np.radians(np.arange(Vertices) * theta)
+        listVertX = Radius * np.cos(angles)
+        listVertY = Radius * np.sin(angles)
 
         if Angle < 360 and self.mode_ == 0:
             sigma = radians(Angle)
             listVertX[-1] = Radius * cos(sigma)
             listVertY[-1] = Radius * sin(sigma)
         elif Angle < 360 and self.mode_ == 1:
-            listVertX.append(0.0)
-            listVertY.append(0.0)
+            listVertX = np.append(listVertX, 0.0)
+            listVertY = np.append(listVertY, 0.0)
 
-        points = list((x, y, 0) for x, y in zip(listVertX, listVertY))
+        points = np.column_stack((listVertX, listVertY, np.zeros_like(listVertX)))
 
-        listEdg = [(i, i + 1) for i in range(Vertices - 1)]
+        listEdg = np.column_stack((np.arange(Vertices - 1), np.arange(1, Vertices)))
 
         if Angle < 360 and self.mode_ == 1:
-            listEdg.append((0, Vertices))
-            listEdg.append((Vertices - 1, Vertices))
+            listEdg = np.vstack((listEdg, ((0, Vertices), (Vertices - 1, Vertices))))
         else:
-            listEdg.append((Vertices - 1, 0))
+            listEdg = np.vstack((listEdg, ((Vertices - 1, 0),)))
 
         return points, listEdg
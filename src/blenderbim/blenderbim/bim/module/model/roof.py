@@ -28,12 +28,19 @@ from blenderbim.bim.module.model.data import RoofData, refresh
 from blenderbim.bim.module.model.decorator import ProfileDecorator
 
 import json
+import numpy as np
+from itertools import chain, compress
 from math import tan, pi, radians
-from mathutils import Vector, Matrix
+from mathutils import Vector, Quaternion
 import mathutils.geometry
+import mathutils.kdtree
 from bpypolyskel import bpypolyskel
 import shapely
-from pprint import pprint
+
+SKELETON_CACHE_SIZE = 32
+ROOF_POLYGON_CACHE_SIZE = 32
+skeleton_cache = {}
+roof_polygon_cache = {}
 
 # reference:
 # https://ifc43-docs.standards.buildingsmart.org/IFC/RELEASE/IFC4x3/HTML/lexical/IfcRoof.htm
@@ -44,13 +51,152 @@ def float_is_zero(f):
     return 0.0001 >= f >= -0.0001
 
 
+def union_lines(lines, chunk_threshold=64):
+    """union array of shapely lines.
+
+    Big inputs are unioned in chunks first and then partial results are unioned together
+    which is a lot faster for GEOS than unioning it all at once"""
+    if len(lines) <= chunk_threshold:
+        return shapely.union_all(lines)
+    chunk_size = int(len(lines) ** 0.5)
+    partial_unions = [shapely.union_all(lines[i : i + chunk_size]) for i in range(0, len(lines), chunk_size)]
+    return shapely.union_all(partial_unions)
+
+
+def get_skeleton_input_from_polygon(roof_polygon):
+    """return verts, total exterior verts and inner loops of the polygon
+    in the format required by `bpypolyskel.polygonize`,
+    verts are in counter-clockwise order"""
+    # coordinates of all the rings at once: exterior first, then interiors
+    rings = [roof_polygon.exterior, *roof_polygon.interiors]
+    coords, ring_indices = shapely.get_coordinates(rings, include_z=True, return_index=True)
+    ring_sizes = np.bincount(ring_indices)
+    ring_ends = np.cumsum(ring_sizes) - 1
+
+    # make sure the polygon is counter-clockwise
+    # by checking the sign of the exterior ring area (shoelace formula)
+    x, y = coords[: ring_sizes[0], 0], coords[: ring_sizes[0], 1]
+    if np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]) < 0:
+        # reversing each ring separately
+        ring_starts = ring_ends - ring_sizes + 1
+        coords = coords[np.concatenate([np.arange(end, start - 1, -1) for start, end in zip(ring_starts, ring_ends)])]
+
+    # last coordinate of each ring is the same as the first one
+    coords = np.delete(coords, ring_ends, axis=0)
+    ring_sizes -= 1
+    ring_starts = np.cumsum(ring_sizes) - ring_sizes
+
+    verts = [Vector(co) for co in coords.tolist()]
+    total_exterior_verts = int(ring_sizes[0])
+    # None in case when there is no .interiors
+    inner_loops = list(zip(ring_starts[1:].tolist(), ring_sizes[1:].tolist())) or None
+    return verts, total_exterior_verts, inner_loops
+
+
+def get_skeleton_faces(verts, total_exterior_verts, inner_loops, mode="ANGLE", height=1.0, angle=pi / 18):
+    """run `bpypolyskel.polygonize` for the roof generation `mode`,
+    `verts` are extended with the new skeleton verts
+
+    Results are cached since the same footprint is regenerated a lot
+    (e.g. every decorator update while editing roof path)"""
+    if mode == "HEIGHT":
+        angle = 0.0
+    else:
+        angle = tan(angle)
+        height = 0.0
+
+    key = (
+        tuple(round(c, 6) for v in verts for c in v),
+        total_exterior_verts,
+        tuple(inner_loops) if inner_loops else None,
+        round(height, 6),
+        round(angle, 6),
+    )
+    skeleton = skeleton_cache.get(key)
+    if skeleton is None:
+        total_footprint_verts = len(verts)
+        unit_vectors = None  # we have no unit vectors, let them computed by polygonize()
+        start_exterior_index = 0
+        faces = []
+        faces = bpypolyskel.polygonize(
+            verts, start_exterior_index, total_exterior_verts, inner_loops, height, angle, faces, unit_vectors
+        )
+        skeleton = (tuple(v.to_tuple() for v in verts[total_footprint_verts:]), tuple(tuple(f) for f in faces))
+        if len(skeleton_cache) >= SKELETON_CACHE_SIZE:
+            # drop the oldest skeleton
+            del skeleton_cache[next(iter(skeleton_cache))]
+        skeleton_cache[key] = skeleton
+        return faces
+
+    skeleton_verts, faces = skeleton
+    verts.extend(Vector(v) for v in skeleton_verts)
+    return [list(face) for face in faces]
+
+
+def get_roof_polygon(edges_coords):
+    """return 3d polygon with the biggest area
+    formed by the (edges, 2, 3) array of edges coordinates
+
+    Polygons are cached by the rounded edges coordinates
+    to avoid noding and polygonizing the same footprint again"""
+    key = np.round(edges_coords, 6).tobytes()
+    roof_polygon = roof_polygon_cache.get(key)
+    if roof_polygon is not None:
+        return roof_polygon
+
+    # creating all boundary lines at once
+    boundary_lines = shapely.linestrings(edges_coords)
+
+    unioned_boundaries = union_lines(boundary_lines)
+    # polygonize noded lines as single geometry
+    # instead of splitting them into separate python geometry objects
+    closed_polygons = shapely.polygonize([unioned_boundaries])
+
+    # find the polygon with the biggest area
+    # in most cases path forms just a single polygon
+    polygons = shapely.get_parts(closed_polygons)
+    if len(polygons) == 1:
+        roof_polygon = polygons[0]
+    else:
+        roof_polygon = polygons[np.argmax(shapely.area(polygons))]
+
+    # add z coordinate if not present
+    if not shapely.has_z(roof_polygon):
+        roof_polygon = shapely.force_3d(roof_polygon)
+
+    if len(roof_polygon_cache) >= ROOF_POLYGON_CACHE_SIZE:
+        # drop the oldest polygon
+        del roof_polygon_cache[next(iter(roof_polygon_cache))]
+    roof_polygon_cache[key] = roof_polygon
+    return roof_polygon
+
+
+def calculate_hiped_roof(verts_co, edges_verts, mode="ANGLE", height=1.0, angle=pi / 18):
+    """return verts and faces of the hipped roof generated on the footprint
+
+    `verts_co` - (verts, 3) array of footprint verts coordinates
+    `edges_verts` - (edges, 2) array of footprint edges verts indices
+    """
+    roof_polygon = get_roof_polygon(verts_co[edges_verts])
+
+    # Define vertices for the base footprint of the building at height 0.0
+    # counterclockwise order
+    verts, total_exterior_verts, inner_loops = get_skeleton_input_from_polygon(roof_polygon)
+
+    faces = get_skeleton_faces(verts, total_exterior_verts, inner_loops, mode, height, angle)
+    return verts, faces
+
+
 def bm_mesh_clean_up(bm):
     # remove internal edges and faces
     # adding missing faces so we could rely on `e.is_boundary` later
     bmesh.ops.contextual_create(bm, geom=bm.edges[:])
+    # skipping ops that would have nothing to do, e.g. for a simple closed path
     edges_to_dissolve = [e for e in bm.edges if not e.is_boundary]
-    bmesh.ops.dissolve_edges(bm, edges=edges_to_dissolve)
-    bmesh.ops.delete(bm, geom=bm.faces[:], context="FACES_ONLY")
+    if edges_to_dissolve:
+        bmesh.ops.dissolve_edges(bm, edges=edges_to_dissolve)
+    if bm.faces:
+        bmesh.ops.delete(bm, geom=bm.faces[:], context="FACES_ONLY")
     bmesh.ops.dissolve_limit(
         bm,
         angle_limit=0.0872665,
@@ -97,9 +243,8 @@ class GenerateHippedRoof(bpy.types.Operator, tool.Ifc.Operator):
 
 def is_valid_roof_footprint(bm):
     # should be bmesh to support edit mode
-    bm.verts.ensure_lookup_table()
-    base_z = bm.verts[0].co.z
-    all_verts_same_level = all([float_is_zero(v.co.z - base_z) for v in bm.verts[1:]])
+    verts_z = np.fromiter((v.co.z for v in bm.verts), dtype=float, count=len(bm.verts))
+    all_verts_same_level = np.all(np.abs(verts_z[1:] - verts_z[0]) <= 0.0001)
     if not all_verts_same_level:
         return (
             {"ERROR"},
@@ -126,156 +271,113 @@ def generate_hiped_roof_bmesh(
 
     # CLEAN UP
     bm_mesh_clean_up(bm)
-
-    boundary_lines = []
+    # clean up ops leave indices dirty and we rely on them below
+    bm.verts.index_update()
 
     original_geometry_data = dict()
     angle_layer = bm.edges.layers.float.get("BBIM_gable_roof_angles")
     separate_verts_layer = bm.edges.layers.int.get("BBIM_gable_roof_separate_verts")
+    # keeping only edges with angle defined by user
+    # since other edges won't affect the generated roof
     if angle_layer:
         original_geometry_data["edges"] = [
-            (set(bm_get_indices(e.verts)), e[angle_layer], e[separate_verts_layer]) for e in bm.edges
+            (tuple(sorted(bm_get_indices(e.verts))), e[angle_layer], e[separate_verts_layer])
+            for e in bm.edges
+            if e[angle_layer]
         ]
     else:
-        original_geometry_data["edges"] = [(set(bm_get_indices(e.verts)), None, None) for e in bm.edges]
+        original_geometry_data["edges"] = []
 
     original_geometry_data["verts"] = {v.index: v.co.copy() for v in bm.verts}
     footprint_z = bm.verts[:][0].co.z
 
-    def calculate_hiped_roof():
-        for edge in bm.edges:
-            boundary_lines.append(shapely.LineString([v.co for v in edge.verts]))
-
-        unioned_boundaries = shapely.union_all(shapely.GeometryCollection(boundary_lines))
-        closed_polygons = shapely.polygonize(unioned_boundaries.geoms)
-
-        # find the polygon with the biggest area
-        roof_polygon = max(closed_polygons.geoms, key=lambda polygon: polygon.area)
-
-        # add z coordinate if not present
-        roof_polygon = shapely.force_3d(roof_polygon)
-
-        # make sure the polygon is counter-clockwise
-        if not shapely.is_ccw(roof_polygon):
-            roof_polygon = roof_polygon.reverse()
-
-        # Define vertices for the base footprint of the building at height 0.0
-        # counterclockwise order
-        verts = [Vector(v) for v in roof_polygon.exterior.coords[0:-1]]
-        total_exterior_verts = len(verts)
-        next_index = total_exterior_verts
-
-        inner_loops = None  # in case when there is no .interiors
-        for interior in roof_polygon.interiors:
-            if inner_loops is None:
-                inner_loops = []
-            loop = interior.coords[0:-1]
-            total_verts = len(loop)
-            verts.extend([Vector(v) for v in loop])
-            inner_loops.append((next_index, total_verts))
-            next_index += total_verts
-
-        unit_vectors = None  # we have no unit vectors, let them computed by polygonize()
-        start_exterior_index = 0
-
-        faces = []
-        nonlocal height, angle
-        if mode == "HEIGHT":
-            height = height
-            angle = 0.0
-        else:
-            angle = tan(angle)
-            height = 0.0
-
-        faces = bpypolyskel.polygonize(
-            verts, start_exterior_index, total_exterior_verts, inner_loops, height, angle, faces, unit_vectors
-        )
-        edges = []
-        return verts, edges, faces
-
-    verts, edges, faces = calculate_hiped_roof()
+    # reading each vert coordinates only once
+    verts_co = np.fromiter(chain.from_iterable(v.co for v in bm.verts), dtype=float, count=len(bm.verts) * 3)
+    edges_verts = np.fromiter((v.index for edge in bm.edges for v in edge.verts), dtype=int, count=len(bm.edges) * 2)
+    verts, faces = calculate_hiped_roof(verts_co.reshape(-1, 3), edges_verts.reshape(-1, 2), mode, height, angle)
     bm.clear()
 
-    new_verts = [bm.verts.new(v) for v in verts]
-    new_edges = [bm.edges.new([new_verts[vi] for vi in edge]) for edge in edges]
-    new_faces = [bm.faces.new([new_verts[vi] for vi in face]) for face in faces]
-
-    def find_identical_new_vert(co):
-        for v in bm.verts:
-            if float_is_zero((co - v.co).length):
-                return v
+    # binding methods to avoid attribute lookups for each new element
+    new_vert, new_face = bm.verts.new, bm.faces.new
+    new_verts = [new_vert(v) for v in verts]
+    new_faces = [new_face([new_verts[vi] for vi in face]) for face in faces]
 
     def find_other_polygon_verts(edge):
+        # bmesh already stores edge-face adjacency, no need for a separate lookup
         polygon = edge.link_faces[0]
-        return [v for v in polygon.verts if v not in edge.verts]
+        edge_verts = set(edge.verts)
+        return [v for v in polygon.verts if v not in edge_verts]
+
+    def get_edge_angle_data(edge_verts, new_angle):
+        """values for `change_angle` that are the same for all verts related to the edge"""
+        A, B = [v.co.copy() for v in edge_verts]
+        AB_dir = (B - A).normalized()
+        return A, AB_dir, tan(new_angle)
 
-    def change_angle(projected_vert_co, edge_verts, new_angle):
-        A, B = [v.co for v in edge_verts]
+    def change_angle(projected_vert_co, edge_angle_data):
+        A, AB_dir, angle_tan = edge_angle_data
         P = projected_vert_co
 
-        AP = P - A
-        AB = B - A
-        AB_dir = AB.normalized()
-        proj_length = AP.dot(AB_dir)
+        proj_length = (P - A).dot(AB_dir)
         C = A + AB_dir * proj_length
-        Pp = P * Vector([1, 1, 0]) + Vector([0, 0, C.z])
+        # P projected on the C z-level
+        Pp = Vector((P.x, P.y, C.z))
 
-        Pp = P * Vector([1, 1, 0]) + Vector([0, 0, C.z])
-        angle_tan = tan(new_angle)
-        dist = (P.z - Pp.z) / angle_tan
-        PPnew = C + (Pp - C).normalized() * dist
-        Pnew = PPnew * Vector([1, 1, 0]) + Vector([0, 0, P.z])
+        dist = (P.z - C.z) / angle_tan
+        Pnew = C + (Pp - C).normalized() * dist
+        Pnew.z = P.z
         return Pnew
 
-    footprint_edges = []
-    footprint_verts = set()
     verts_to_change = {}
     verts_to_rip = []
     bottom_chords_to_remove = []
 
-    def is_footprint_vert(v):
-        return float_is_zero(v.co.z - footprint_z)
-
-    def is_footprint_edge(edge):
-        return all(is_footprint_vert(v) for v in edge.verts)
-
     # find footprint edges
-    for edge in bm.edges:
-        if is_footprint_edge(edge):
-            footprint_edges.append(edge)
-            footprint_verts.update(edge.verts)
-
+    # checking z-levels with numpy to avoid testing each edge vert in python
+    # verts coordinates are read from bmesh only once and reused below
+    bm.verts.index_update()
+    verts_co = np.fromiter(chain.from_iterable(v.co for v in bm.verts), dtype=float, count=len(bm.verts) * 3)
+    verts_co = verts_co.reshape(-1, 3)
+    footprint_verts_mask = np.abs(verts_co[:, 2] - footprint_z) <= 0.0001
+    edges_verts = np.fromiter(
+        (v.index for edge in bm.edges for v in edge.verts), dtype=int, count=len(bm.edges) * 2
+    ).reshape(-1, 2)
+    footprint_edges = list(compress(bm.edges, footprint_verts_mask[edges_verts].all(axis=1)))
+
+    # only verts of the edges with user defined angles need to be remapped
+    old_verts_to_remap = set(chain.from_iterable(edge[0] for edge in original_geometry_data["edges"]))
     old_verts_remap = {}
-    for old_vert in original_geometry_data["verts"]:
-        old_vert_co = original_geometry_data["verts"][old_vert]
-        old_verts_remap[old_vert] = find_identical_new_vert(old_vert_co)
+    if old_verts_to_remap:
+        # kd tree to find identical new verts without checking every vert
+        kd = mathutils.kdtree.KDTree(len(bm.verts))
+        for i, co in enumerate(verts_co.tolist()):
+            kd.insert(co, i)
+        kd.balance()
+        bm.verts.ensure_lookup_table()
+
+        for old_vert in old_verts_to_remap:
+            co, index, dist = kd.find(original_geometry_data["verts"][old_vert])
+            old_verts_remap[old_vert] = bm.verts[index] if dist is not None and float_is_zero(dist) else None
 
     # iterate over edges from original geometry
     # if their angle was redefined by user - apply the changes to the related vertices
     # to match the requested angle
 
     process_later = []
+    footprint_edges_by_verts = {frozenset(edge.verts): edge for edge in footprint_edges}
     for old_edge_verts, defined_angle, separate_verts in original_geometry_data["edges"]:
-        if not defined_angle:
-            continue
-
-        edge_verts_remaped = set(old_verts_remap[old_vert] for old_vert in old_edge_verts)
-
-        identical_edge = None
-        for edge in footprint_edges:
-            if set(edge.verts) == edge_verts_remaped:
-                identical_edge = edge
-                break
+        edge_verts_remaped = frozenset(old_verts_remap[old_vert] for old_vert in old_edge_verts)
+        identical_edge = footprint_edges_by_verts.get(edge_verts_remaped)
         assert identical_edge
 
+        edge_angle_data = get_edge_angle_data(edge_verts_remaped, defined_angle)
         if separate_verts:
             verts_to_move = find_other_polygon_verts(identical_edge)
             for v in verts_to_move:
-                vert_co = v.co
-                new_vert_co = change_angle(vert_co, edge_verts_remaped, defined_angle)
+                new_vert_co = change_angle(v.co, edge_angle_data)
                 verts_to_rip.append([v, new_vert_co, identical_edge])
         else:
-            process_later.append([identical_edge, edge_verts_remaped, defined_angle])
+            process_later.append([identical_edge, edge_angle_data])
 
         if defined_angle >= pi / 2:
             bottom_chords_to_remove.append(identical_edge)
@@ -302,19 +404,21 @@ def generate_hiped_roof_bmesh(
     # verts angle correction.
     # we're taking into account new verts created after verts separation
     # required for asymmetrical gable roof
-    for identical_edge, edge_verts_remaped, defined_angle in process_later:
+    for identical_edge, edge_angle_data in process_later:
         verts_to_move = find_other_polygon_verts(identical_edge)
         for v in verts_to_move[:]:
             verts_to_move.extend(related_verts.get(v, []))
 
         for v in verts_to_move:
             vert_co = verts_to_change.get(v, v.co)
-            new_vert_co = change_angle(vert_co, edge_verts_remaped, defined_angle)
+            new_vert_co = change_angle(vert_co, edge_angle_data)
             verts_to_change[v] = new_vert_co
 
     # apply all changes once at the end
-    for v in verts_to_change:
-        v.co = verts_to_change[v]
+    # NOTE: roof is extruded right after so changes can't be applied to the mesh
+    # directly with `foreach_set`, they're applied to the bmesh
+    for v, new_co in verts_to_change.items():
+        v.co = new_co
 
     bmesh.ops.delete(bm, geom=bottom_chords_to_remove, context="EDGES")
 
@@ -327,9 +431,15 @@ def generate_hiped_roof_bmesh(
     footprint_verts = set()
 
     if not float_is_zero(rafter_edge_angle):
+        # checking z-levels of all verts at once, extrusion added new verts
+        bm.verts.index_update()
+        verts_z = np.fromiter((v.co.z for v in bm.verts), dtype=float, count=len(bm.verts))
+        is_footprint_vert = (np.abs(verts_z - footprint_z) <= 0.0001).tolist()
+
         footprint_edges = []
         for edge in extruded_edges:
-            if is_footprint_edge(edge):
+            v0, v1 = edge.verts
+            if is_footprint_vert[v0.index] and is_footprint_vert[v1.index]:
                 footprint_edges.append(edge)
                 footprint_verts.update(edge.verts)
 
@@ -337,7 +447,7 @@ def generate_hiped_roof_bmesh(
             non_footprint_verts = []
             for edge in v.link_edges:
                 v1 = edge.other_vert(v)
-                if not is_footprint_vert(v1):
+                if not is_footprint_vert[v1.index]:
                     non_footprint_verts.append(v1)
 
             if len(non_footprint_verts) == 1:
@@ -355,7 +465,8 @@ def generate_hiped_roof_bmesh(
         for edge in footprint_edges:
             v0, v1 = edge.verts
             edge_dir = (v0.co - v1.co).normalized()
-            offset_dir = Matrix.Rotation(rafter_edge_angle, 4, edge_dir) @ default_offset_dir
+            # quaternion rotates vector directly without building 4x4 rotation matrix
+            offset_dir = Quaternion(edge_dir, rafter_edge_angle) @ default_offset_dir
             for v in edge.verts:
                 previous_offset = verts_offsets.get(v, None)
                 if previous_offset:
@@ -373,8 +484,11 @@ def generate_hiped_roof_bmesh(
             # for different rafter edge angles
             v.co = mathutils.geometry.intersect_line_line(bot, top, base, offsetted)[0]
 
-    verts = [v for v in extruded_verts if v not in footprint_verts]
-    bmesh.ops.translate(bm, vec=default_offset_dir, verts=verts)
+    # moving verts in the same pass as filtering them out
+    # instead of collecting them for `bmesh.ops.translate`
+    for v in extruded_verts:
+        if v not in footprint_verts:
+            v.co += default_offset_dir
     bmesh.ops.recalc_face_normals(bm, faces=bm.faces[:])
     return bm
 
@@ -434,6 +548,12 @@ def update_roof_modifier_bmesh(context):
     separate_verts_data = path_data.get("gable_roof_separate_verts", None)
 
     si_conversion = ifcopenshell.util.unit.calculate_unit_scale(tool.Ifc.get())
+
+    if props.is_editing_path and not obj.data.is_editmode:
+        # roof path is just verts and edges, no need for bmesh to create it
+        update_roof_path_mesh(obj.data, path_data, si_conversion)
+        return
+
     # need to make sure we support edit mode
     # since users will probably be in edit mode when they'll be changing roof path
     bm = tool.Blender.get_bmesh_for_mesh(obj.data, clean=True)
@@ -441,14 +561,12 @@ def update_roof_modifier_bmesh(context):
     separate_verts_layer = bm.edges.layers.int.new("BBIM_gable_roof_separate_verts")
 
     # generating roof path
-    new_verts = [bm.verts.new(Vector(v) * si_conversion) for v in path_data["verts"]]
-    new_edges = []
-    for i in range(len(path_data["edges"])):
-        e = path_data["edges"][i]
-        edge = bm.edges.new((new_verts[e[0]], new_verts[e[1]]))
+    new_vert, new_edge = bm.verts.new, bm.edges.new
+    new_verts = [new_vert(Vector(v) * si_conversion) for v in path_data["verts"]]
+    for i, e in enumerate(path_data["edges"]):
+        edge = new_edge((new_verts[e[0]], new_verts[e[1]]))
         edge[angle_layer] = angle_layer_data[i] if angle_layer_data else 0
         edge[separate_verts_layer] = separate_verts_data[i] if separate_verts_data else 0
-        new_edges.append(edge)
 
     if props.is_editing_path:
         tool.Blender.apply_bmesh(obj.data, bm)
@@ -466,6 +584,28 @@ def update_roof_modifier_bmesh(context):
     tool.Blender.apply_bmesh(obj.data, bm)
 
 
+def update_roof_path_mesh(mesh, path_data, si_conversion):
+    """fill mesh with roof path geometry and edge attributes from `path_data`,
+    works only for meshes that are not in EDIT mode"""
+    mesh.clear_geometry()
+    mesh.from_pydata([Vector(v) * si_conversion for v in path_data["verts"]], path_data["edges"], [])
+
+    total_edges = len(path_data["edges"])
+    angle_layer_data = path_data.get("gable_roof_angles", None) or [0.0] * total_edges
+    separate_verts_data = path_data.get("gable_roof_separate_verts", None) or [0] * total_edges
+
+    # check if attribute exists or create one
+    if "BBIM_gable_roof_angles" not in mesh.attributes:
+        mesh.attributes.new("BBIM_gable_roof_angles", type="FLOAT", domain="EDGE")
+
+    if "BBIM_gable_roof_separate_verts" not in mesh.attributes:
+        mesh.attributes.new("BBIM_gable_roof_separate_verts", type="INT", domain="EDGE")
+
+    mesh.attributes["BBIM_gable_roof_angles"].data.foreach_set("value", angle_layer_data)
+    mesh.attributes["BBIM_gable_roof_separate_verts"].data.foreach_set("value", separate_verts_data)
+    mesh.update()
+
+
 def get_path_data(obj):
     """get path data for current mesh, path data is cleaned up"""
     si_conversion = ifcopenshell.util.unit.calculate_unit_scale(tool.Ifc.get())
@@ -481,9 +621,14 @@ def get_path_data(obj):
     angle_layer = bm.edges.layers.float.get("BBIM_gable_roof_angles")
     separate_verts_layer = bm.edges.layers.int.get("BBIM_gable_roof_separate_verts")
 
+    # clean up ops leave indices dirty
+    bm.verts.index_update()
+    verts_co = np.fromiter(chain.from_iterable(v.co for v in bm.verts), dtype=float, count=len(bm.verts) * 3)
+    edges_verts = np.fromiter((v.index for e in bm.edges for v in e.verts), dtype=int, count=len(bm.edges) * 2)
+
     path_data = dict()
-    path_data["edges"] = [bm_get_indices(e.verts) for e in bm.edges]
-    path_data["verts"] = [v.co / si_conversion for v in bm.verts]
+    path_data["edges"] = edges_verts.reshape(-1, 2).tolist()
+    path_data["verts"] = (verts_co.reshape(-1, 3) / si_conversion).tolist()
     if angle_layer:
         path_data["gable_roof_angles"] = [e[angle_layer] for e in bm.edges]
     if separate_verts_layer:
@@ -670,6 +815,30 @@ class EnableEditingRoofPath(bpy.types.Operator, tool.Ifc.Operator):
             for edge in new_edges:
                 edge[preview_layer] = 1
 
+        # roof bmesh is cached since decorator might request it
+        # even if roof path and roof parameters didn't change
+        roof_cache = {}
+
+        def get_roof_cache_key(bm):
+            angle_layer = bm.edges.layers.float.get("BBIM_gable_roof_angles")
+            separate_verts_layer = bm.edges.layers.int.get("BBIM_gable_roof_separate_verts")
+            edges_data = tuple(
+                (
+                    tuple(round(c, 6) for v in e.verts for c in v.co),
+                    e[angle_layer] if angle_layer else None,
+                    e[separate_verts_layer] if separate_verts_layer else None,
+                )
+                for e in bm.edges
+            )
+            roof_parameters = (
+                props.generation_method,
+                props.height,
+                props.roof_thickness,
+                props.angle,
+                props.rafter_edge_angle,
+            )
+            return edges_data, roof_parameters
+
         def get_custom_bmesh():
             # copying to make sure not to mutate the edit mode bmesh
             bm = tool.Blender.get_bmesh_for_mesh(obj.data)
@@ -681,16 +850,23 @@ class EnableEditingRoofPath(bpy.types.Operator, tool.Ifc.Operator):
 
             main_bm.edges.layers.int.new("BBIM_preview")
 
-            second_bm = generate_hiped_roof_bmesh(
-                bm,
-                props.generation_method,
-                props.height,
-                props.roof_thickness,
-                props.angle,
-                props.rafter_edge_angle,
-                mutate_current_bmesh=False,
-            )
-            bmesh.ops.translate(second_bm, verts=second_bm.verts, vec=Vector((0, 0, 1)))
+            cache_key = get_roof_cache_key(bm)
+            if cache_key != roof_cache.get("key"):
+                second_bm = generate_hiped_roof_bmesh(
+                    bm,
+                    props.generation_method,
+                    props.height,
+                    props.roof_thickness,
+                    props.angle,
+                    props.rafter_edge_angle,
+                    mutate_current_bmesh=False,
+                )
+                bmesh.ops.translate(second_bm, verts=second_bm.verts, vec=Vector((0, 0, 1)))
+                if "bm" in roof_cache:
+                    roof_cache["bm"].free()
+                roof_cache["key"] = cache_key
+                roof_cache["bm"] = second_bm
+            second_bm = roof_cache["bm"]
 
             tool.Blender.bmesh_join(main_bm, second_bm, callback=mark_preview_edges)
             return main_bm
@@ -251,10 +251,13 @@ class Blender:
         """Join two meshes into single one, store it in `bm_a`"""
         import bmesh
 
-        new_verts = [bm_a.verts.new(v.co) for v in bm_b.verts]
-        new_edges = [bm_a.edges.new([new_verts[v.index] for v in edge.verts]) for edge in bm_b.edges]
-        new_faces = [bm_a.faces.new([new_verts[v.index] for v in face.verts]) for face in bm_b.faces]
-        bmesh.ops.recalc_face_normals(bm_a, faces=bm_a.faces[:])
+        new_vert, new_edge, new_face = bm_a.verts.new, bm_a.edges.new, bm_a.faces.new
+        new_verts = [new_vert(v.co) for v in bm_b.verts]
+        new_edges = [new_edge([new_verts[v.index] for v in edge.verts]) for edge in bm_b.edges]
+        new_faces = [new_face([new_verts[v.index] for v in face.verts]) for face in bm_b.faces]
+        # only joined faces need normals recalculation
+        if new_faces:
+            bmesh.ops.recalc_face_normals(bm_a, faces=new_faces)
 
         if callback:
             callback(bm_a, new_verts, new_edges, new_faces)
@@ -16,273 +16,162 @@
 # You should have received a copy of the GNU General Public License
 # along with BlenderBIM Add-on.  If not, see <http://www.gnu.org/licenses/>.
 
-import json
+import copy
+import inspect
 import pytest
+from collections import Counter, deque
 import blenderbim.core.tool
 
 
-@pytest.fixture
-def ifc():
-    prophet = Prophecy(blenderbim.core.tool.Ifc)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def blender():
-    prophet = Prophecy(blenderbim.core.tool.Blender)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def brick():
-    prophet = Prophecy(blenderbim.core.tool.Brick)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def aggregate():
-    prophet = Prophecy(blenderbim.core.tool.Aggregate)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def collector():
-    prophet = Prophecy(blenderbim.core.tool.Collector)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def context():
-    prophet = Prophecy(blenderbim.core.tool.Context)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def debug():
-    prophet = Prophecy(blenderbim.core.tool.Debug)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def demo():
-    prophet = Prophecy(blenderbim.core.tool.Demo)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def document():
-    prophet = Prophecy(blenderbim.core.tool.Document)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def drawing():
-    prophet = Prophecy(blenderbim.core.tool.Drawing)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def geometry():
-    prophet = Prophecy(blenderbim.core.tool.Geometry)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def georeference():
-    prophet = Prophecy(blenderbim.core.tool.Georeference)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def library():
-    prophet = Prophecy(blenderbim.core.tool.Library)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def material():
-    prophet = Prophecy(blenderbim.core.tool.Material)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def misc():
-    prophet = Prophecy(blenderbim.core.tool.Misc)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def owner():
-    prophet = Prophecy(blenderbim.core.tool.Owner)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def patch():
-    prophet = Prophecy(blenderbim.core.tool.Patch)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def project():
-    prophet = Prophecy(blenderbim.core.tool.Project)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def pset():
-    prophet = Prophecy(blenderbim.core.tool.Pset)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def qto():
-    prophet = Prophecy(blenderbim.core.tool.Qto)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def root():
-    prophet = Prophecy(blenderbim.core.tool.Root)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def selector():
-    prophet = Prophecy(blenderbim.core.tool.Selector)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def sequence():
-    prophet = Prophecy(blenderbim.core.tool.Sequence)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def spatial():
-    prophet = Prophecy(blenderbim.core.tool.Spatial)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def style():
-    prophet = Prophecy(blenderbim.core.tool.Style)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def surveyor():
-    prophet = Prophecy(blenderbim.core.tool.Surveyor)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def system():
-    prophet = Prophecy(blenderbim.core.tool.System)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def type():
-    prophet = Prophecy(blenderbim.core.tool.Type)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def unit():
-    prophet = Prophecy(blenderbim.core.tool.Unit)
-    yield prophet
-    prophet.verify()
-
-
-@pytest.fixture
-def voider():
-    prophet = Prophecy(blenderbim.core.tool.Voider)
-    yield prophet
-    prophet.verify()
+# prophecies are created once per subject and copied for each test
+prophecy_templates = {}
+# marks calls without return value, as None is a valid one
+_SENTINEL = object()
+
+
+def freeze(value):
+    """return hashable version of the call data to use it as a dict key"""
+    if isinstance(value, dict):
+        return tuple((k, freeze(v)) for k, v in sorted(value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+def get_prophecy(subject):
+    template = prophecy_templates.get(subject)
+    if template is None:
+        template = prophecy_templates[subject] = Prophecy(subject)
+    return copy.copy(template)
+
+
+def prophecy_fixture(name, subject):
+    def fixture():
+        prophet = get_prophecy(subject)
+        yield prophet
+        prophet.verify()
+
+    return pytest.fixture(fixture, name=name)
+
+
+# fixtures for each tool, e.g. `ifc` for `blenderbim.core.tool.Ifc`
+for fixture_name in (
+    "ifc",
+    "blender",
+    "brick",
+    "aggregate",
+    "collector",
+    "context",
+    "debug",
+    "demo",
+    "document",
+    "drawing",
+    "geometry",
+    "georeference",
+    "library",
+    "material",
+    "misc",
+    "owner",
+    "patch",
+    "project",
+    "pset",
+    "qto",
+    "root",
+    "selector",
+    "sequence",
+    "spatial",
+    "style",
+    "surveyor",
+    "system",
+    "type",
+    "unit",
+    "voider",
+):
+    globals()[fixture_name] = prophecy_fixture(fixture_name, getattr(blenderbim.core.tool, fixture_name.capitalize()))
 
 
 class Prophecy:
+    __slots__ = ("subject", "subject_signatures", "predictions", "calls", "return_values", "should_call")
+
     def __init__(self, cls):
         self.subject = cls
-        self.predictions = []
-        self.calls = []
+        # subject attributes signatures, shared between copies of the prophecy
+        self.subject_signatures = {}
+        self.reset()
+
+    def __copy__(self):
+        """return prophecy sharing subject signatures but without any calls or predictions"""
+        # default copy would resolve attributes through __getattr__ before subject is set
+        prophet = Prophecy.__new__(Prophecy)
+        prophet.subject = self.subject
+        prophet.subject_signatures = self.subject_signatures
+        prophet.reset()
+        return prophet
+
+    def reset(self):
+        self.predictions = deque()
+        self.calls = deque()
         self.return_values = {}
         self.should_call = None
 
     def __getattr__(self, attr):
-        if not hasattr(self.subject, attr):
-            raise AttributeError(f"Prophecy {self.subject} has no attribute {attr}")
+        if attr in Prophecy.__slots__:
+            # slot is not set yet, it's not a subject attribute
+            raise AttributeError(attr)
+        signature = self.subject_signatures.get(attr)
+        if signature is None:
+            if not hasattr(self.subject, attr):
+                raise AttributeError(f"Prophecy {self.subject} has no attribute {attr}")
+            signature = self.subject_signatures[attr] = inspect.signature(getattr(self.subject, attr))
 
         def decorate(*args, **kwargs):
             call = {"name": attr, "args": args, "kwargs": kwargs}
-            # Ensure that signature is valid
-            getattr(self.subject, attr)(*args, **kwargs)
-            try:
-                key = json.dumps(call, sort_keys=True)
-                self.calls.append(call)
-                if key in self.return_values:
-                    return self.return_values[key]
-            except:
-                pass
-            return self
+            # Ensure that signature is valid without actually calling the subject
+            signature.bind(*args, **kwargs)
+            if not self.return_values:
+                # nothing to look up, the key is only computed if the call is verified
+                self.calls.append((call, None))
+                return self
+            # the frozen key is stored with the call so verify doesn't have to freeze it again
+            key = freeze(call)
+            self.calls.append((call, key))
+            value = self.return_values.get(key, _SENTINEL)
+            return self if value is _SENTINEL else value
 
         return decorate
 
     def should_be_called(self, number=None):
-        self.should_call = self.calls.pop()
-        self.predictions.append({"type": "SHOULD_BE_CALLED", "number": number, "call": self.should_call})
+        self.should_call, key = self.calls.pop()
+        if key is None:
+            key = freeze(self.should_call)
+        self.predictions.append({"type": "SHOULD_BE_CALLED", "number": number, "call": self.should_call, "key": key})
         return self
 
     def will_return(self, value):
-        key = json.dumps(self.should_call, sort_keys=True)
-        self.return_values[key] = value
+        self.return_values[self.predictions[-1]["key"]] = value
         return self
 
     def verify(self):
-        predicted_calls = []
-        for prediction in self.predictions:
-            predicted_calls.append(prediction["call"])
+        calls = [(call, freeze(call) if key is None else key) for call, key in self.calls]
+        calls_counts = Counter(key for call, key in calls)
+        predicted_calls = set()
+        # predictions are consumed since verification happens only once
+        while self.predictions:
+            prediction = self.predictions.popleft()
+            key = prediction["key"]
+            predicted_calls.add(key)
             if prediction["type"] == "SHOULD_BE_CALLED":
-                self.verify_should_be_called(prediction)
-        for call in self.calls:
-            if call not in predicted_calls:
+                self.verify_should_be_called(prediction, calls_counts[key])
+        for call, key in calls:
+            if key not in predicted_calls:
                 raise Exception(f"Unpredicted call: {call}")
 
-    def verify_should_be_called(self, prediction):
+    def verify_should_be_called(self, prediction, count):
         if prediction["number"]:
-            count = self.calls.count(prediction["call"])
             if count != prediction["number"]:
                 raise Exception(f"Called {count}: {prediction}")
         else:
-            if prediction["call"] not in self.calls:
+            if not count:
                 raise Exception(f"{self.subject} was not called with {prediction['call']['name']}: {prediction}")
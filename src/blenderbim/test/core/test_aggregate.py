@@ -17,7 +17,6 @@
 # along with BlenderBIM Add-on.  If not, see <http://www.gnu.org/licenses/>.
 
 import blenderbim.core.aggregate as subject
-from test.core.bootstrap import ifc, aggregate, collector
 
 
 class TestEnableEditingAggregate:
@@ -41,7 +41,6 @@ import blenderbim.core.demo as subject
 
 # These are like mocks, stubs, or spy objects. They don't do anything, but they
 # let us check our test expectations.
-from test.core.bootstrap import ifc, demo
 
 
 # Let's test the hello world function.
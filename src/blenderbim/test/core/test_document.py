@@ -18,7 +18,6 @@
 
 
 import blenderbim.core.document as subject
-from test.core.bootstrap import ifc, document
 
 
 class TestLoadProjectDocuments:
@@ -17,7 +17,6 @@
 # along with BlenderBIM Add-on.  If not, see <http://www.gnu.org/licenses/>.
 
 import blenderbim.core.georeference as subject
-from test.core.bootstrap import ifc, georeference
 
 
 class TestAddGeoreferencing:
@@ -18,7 +18,6 @@
 
 
 import blenderbim.core.owner as subject
-from test.core.bootstrap import ifc, owner
 
 
 class TestAddPerson:
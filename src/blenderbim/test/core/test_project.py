@@ -18,7 +18,6 @@
 
 
 import blenderbim.core.project as subject
-from test.core.bootstrap import ifc, project
 
 
 class TestCreateProject:
@@ -18,15 +18,14 @@
 
 import blenderbim.core.root as subject
 import test.core.test_geometry
-from test.core.bootstrap import ifc, collector, geometry, root
 
 
 class TestCopyClass:
-    def test_doing_nothing_if_not_an_ifc_element(self, ifc, collector, root):
+    def test_doing_nothing_if_not_an_ifc_element(self, ifc, collector, geometry, root):
         ifc.get_entity("obj").should_be_called().will_return(None)
         subject.copy_class(ifc, collector, geometry, root, obj="obj")
 
-    def test_copy_with_new_geometry_derived_from_the_type(self, ifc, collector, root):
+    def test_copy_with_new_geometry_derived_from_the_type(self, ifc, collector, geometry, root):
         ifc.get_entity("obj").should_be_called().will_return("original_element")
         root.is_element_a("original_element", "IfcRelSpaceBoundary").should_be_called().will_return(False)
         root.get_object_representation("obj").should_be_called().will_return("representation")
@@ -18,7 +18,6 @@
 
 
 import blenderbim.core.sequence as subject
-from test.core.bootstrap import ifc, sequence
 
 
 class TestAddWorkPlan:
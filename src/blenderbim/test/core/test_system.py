@@ -18,7 +18,6 @@
 
 
 import blenderbim.core.system as subject
-from test.core.bootstrap import ifc, system
 
 
 class TestLoadSystems: